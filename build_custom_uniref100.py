@@ -15,20 +15,31 @@
 # HOWTO:
 # ./build_custom_uniref100.py path_to_sprot_file path_to_uniref_file path_to_map_file
 #
+# If build_uniref100_index.py has been run, pass the BGZF copy as the uniref
+# file along with its index to skip the full pass in stage 3:
+# ./build_custom_uniref100.py path_to_sprot_file path_to_uniref_bgz path_to_map_file path_to_uniref_index
+#
 # Author: James Matsumura
 
 import sys, os, re, gzip, time
+from profiling import Profiler
+from uniref_index import writeSubset
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 sprotFile =  str(sys.argv[1]) 
 unirefFile =  str(sys.argv[2]) # important that this is same version as map file
 mapFile =  str(sys.argv[3]) 
+indexFile = None
+if(len(sys.argv) > 4):
+	indexFile = str(sys.argv[4]) # from build_uniref100_index.py, made from the same uniref file
 
-sprotSetFile = gzip.open(sprotFile, 'rb') # large files, use compression
-origUnirefFile = gzip.open(unirefFile, 'rb') 
-mappingFile = gzip.open(mapFile, 'rb') 
+sprotSetFile = profiler.countRead(gzip.open(sprotFile, 'rb'), compressed=True) # large files, use compression
+mappingFile = profiler.countRead(gzip.open(mapFile, 'rb'), compressed=True) 
 relevantEntryFile = open('./entries_with_evidence.txt', 'w')
 relevantUnirefFile = open('./uniref_with_evidence.txt', 'w')
-outFile = gzip.open('./custom_uniref100.fasta.gz', 'wb')
+outFile = profiler.countWrite(gzip.open('./custom_uniref100.fasta.gz', 'wb'))
 
 # Only want to find those with experimental evidence backing the annotation.
 # Use: http://bioportal.bioontology.org/ontologies/ECO/?p=classes&conceptid=root
@@ -54,6 +65,7 @@ uniqueIds = set()
 uniqueUnirefIds = set()
 
 print "stage 1"
+profiler.start('stage1')
 # 1)
 # The annotations here are messy. Evidence codes are often in the comments (CC)
 # or other tags like feature table (FT) or reference comments (RC). Thus, need
@@ -94,9 +106,12 @@ for line in sprotSetFile:
 			foundAccession = findAccession.group(1)
 			accessionFound = True
 
+profiler.stop() # keep the pause out of the stage timings
 time.sleep(100)
 
 print "stage 2"
+profiler.start('stage2')
+uniqueIds = profiler.countLookups(uniqueIds)
 # 2) 
 # Must map each UniProt entry to its corresponding current UniRef representative.
 for line in mappingFile:
@@ -107,28 +122,40 @@ for line in mappingFile:
 		uniqueUnirefIds = uniqueUnirefIds | {finalId}
 		relevantUnirefFile.write(finalId+'\n')
 	
+profiler.stop() # keep the pause out of the stage timings
 time.sleep(100)
 
 print "stage 3"	
+profiler.start('stage3')
+uniqueUnirefIds = profiler.countLookups(uniqueUnirefIds)
 # 3) 
 # Each UniRef entry is denoted with the UniRef identity level followed by
 # the UniProt accession cluster representative like so:
 # UniRef100_Q6GZX4. This will have been generated from Step 2.
-for line in origUnirefFile:
-
-	if(line.startswith('>')):
-		relevantUnirefEntry = False # must be reset each entry
-		# Some odd formatting in the UniRef file? need to 
-		# actually check to make sure it's in proper format
-		findEntry = re.search(regexForUnirefAccession, line)
-		if(findEntry):
-			foundEntry = findEntry.group(1)
-			# Perhaps the accession wasn't included in the map file. This ideally
-			# should have no impact if the map file was made correctly but I'm
-			# adding it just in case. 
-			if(foundEntry in uniqueUnirefIds or foundEntry in uniqueUnirefIds):
-				relevantUnirefEntry = True
-				outFile.write(line)	
-
-	elif(relevantUnirefEntry == True):
-		outFile.write(line)	
+# With an index, only the relevant entries are decompressed and these are split
+# across worker processes. Output comes back in the same order as the full pass.
+if(indexFile != None):
+	writeSubset(unirefFile, indexFile, uniqueUnirefIds, outFile, counters=profiler.counters)
+
+else:
+	origUnirefFile = profiler.countRead(gzip.open(unirefFile, 'rb'), compressed=True)
+	for line in origUnirefFile:
+
+		if(line.startswith('>')):
+			relevantUnirefEntry = False # must be reset each entry
+			# Some odd formatting in the UniRef file? need to 
+			# actually check to make sure it's in proper format
+			findEntry = re.search(regexForUnirefAccession, line)
+			if(findEntry):
+				foundEntry = findEntry.group(1)
+				# Perhaps the accession wasn't included in the map file. This ideally
+				# should have no impact if the map file was made correctly but I'm
+				# adding it just in case. 
+				if(foundEntry in uniqueUnirefIds or foundEntry in uniqueUnirefIds):
+					relevantUnirefEntry = True
+					outFile.write(line)	
+
+		elif(relevantUnirefEntry == True):
+			outFile.write(line)
+
+profiler.finish()
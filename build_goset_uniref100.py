@@ -21,19 +21,30 @@
 # HOWTO:
 # ./build_goset_uniref100.py path_to_go_accs_file path_to_uniref_file path_to_map_file
 #
+# If build_uniref100_index.py has been run, pass the BGZF copy as the uniref
+# file along with its index to skip the full pass in stage 3:
+# ./build_goset_uniref100.py path_to_go_accs_file path_to_uniref_bgz path_to_map_file path_to_uniref_index
+#
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+from uniref_index import writeSubset
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 goFile =  str(sys.argv[1]) 
 unirefFile =  str(sys.argv[2]) # important that this is same version # as map file
 mapFile =  str(sys.argv[3]) 
+indexFile = None
+if(len(sys.argv) > 4):
+	indexFile = str(sys.argv[4]) # from build_uniref100_index.py, made from the same uniref file
 
-theGoFile = open(goFile, 'r') 
-origUnirefFile = gzip.open(unirefFile, 'rb') 
-mappingFile = gzip.open(mapFile, 'rb') 
+theGoFile = profiler.countRead(open(goFile, 'r')) 
+mappingFile = profiler.countRead(gzip.open(mapFile, 'rb'), compressed=True) 
 relevantUnirefFile = open('./go_to_uniref_with_evidence.txt', 'w')
-outFile = gzip.open('./custom_goev_uniref100.fasta.gz', 'wb')
+outFile = profiler.countWrite(gzip.open('./custom_goev_uniref100.fasta.gz', 'wb'))
 
 footerFound = False
 accessionFound = False
@@ -45,6 +56,7 @@ uniqueIds = set()
 uniqueUnirefIds = set()
 
 print "stage 1"
+profiler.start('stage1')
 # 1)
 # This file has already been preprocessed using bash/vim so that the second column
 # contains the relevant UniProt IDs linked to some GO annotation that had 
@@ -57,6 +69,8 @@ for line in theGoFile:
 	uniqueIds = uniqueIds | {extractUniprot[1]}
 
 print "stage 2"
+profiler.start('stage2')
+uniqueIds = profiler.countLookups(uniqueIds)
 # 2) 
 # Must map each UniProt entry to its corresponding current UniRef representative.
 for line in mappingFile:
@@ -68,25 +82,36 @@ for line in mappingFile:
 		relevantUnirefFile.write(finalId+'\n')
 	
 print "stage 3"	
+profiler.start('stage3')
+uniqueUnirefIds = profiler.countLookups(uniqueUnirefIds)
 # 3) 
 # Each UniRef entry is denoted with the UniRef identity level followed by
 # the UniProt accession cluster representative like so:
 # UniRef100_Q6GZX4. This will have been generated from Step 2.
-for line in origUnirefFile:
+# With an index, only the relevant entries are decompressed and these are split
+# across worker processes. Output comes back in the same order as the full pass.
+if(indexFile != None):
+	writeSubset(unirefFile, indexFile, uniqueUnirefIds, outFile, counters=profiler.counters)
+
+else:
+	origUnirefFile = profiler.countRead(gzip.open(unirefFile, 'rb'), compressed=True)
+	for line in origUnirefFile:
+
+		if(line.startswith('>')):
+			relevantUnirefEntry = False # must be reset each entry
+			# Some odd formatting in the UniRef file? need to 
+			# actually check to make sure it's in proper format
+			findEntry = re.search(regexForUnirefAccession, line)
+			if(findEntry):
+				foundEntry = findEntry.group(1)
+				# Perhaps the accession wasn't included in the map file. This ideally
+				# should have no impact if the map file was made correctly but I'm
+				# adding it just in case. 
+				if(foundEntry in uniqueUnirefIds or foundEntry in uniqueUnirefIds):
+					relevantUnirefEntry = True
+					outFile.write(line)	
 
-	if(line.startswith('>')):
-		relevantUnirefEntry = False # must be reset each entry
-		# Some odd formatting in the UniRef file? need to 
-		# actually check to make sure it's in proper format
-		findEntry = re.search(regexForUnirefAccession, line)
-		if(findEntry):
-			foundEntry = findEntry.group(1)
-			# Perhaps the accession wasn't included in the map file. This ideally
-			# should have no impact if the map file was made correctly but I'm
-			# adding it just in case. 
-			if(foundEntry in uniqueUnirefIds or foundEntry in uniqueUnirefIds):
-				relevantUnirefEntry = True
-				outFile.write(line)	
+		elif(relevantUnirefEntry == True):
+			outFile.write(line)
 
-	elif(relevantUnirefEntry == True):
-		outFile.write(line)	
+profiler.finish()
@@ -56,15 +56,19 @@
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 uniprot_uniref_map =  str(sys.argv[1]) # important to get the same dated versions of all UniProt files 
 go_uniprot_map =  str(sys.argv[2]) 
 go_tsv =  str(sys.argv[3]) 
 
-prot_ref_map_file = gzip.open(uniprot_uniref_map, 'rb') 
-go_tsv_file = open(go_tsv, 'r') 
-go_prot_map_file = open(go_uniprot_map, 'r') 
-outFile1 = open('./map_file.v1.tsv', 'w')
+prot_ref_map_file = profiler.countRead(gzip.open(uniprot_uniref_map, 'rb'), compressed=True) 
+go_tsv_file = profiler.countRead(open(go_tsv, 'r')) 
+go_prot_map_file = profiler.countRead(open(go_uniprot_map, 'r')) 
+outFile1 = profiler.countWrite(open('./map_file.v1.tsv', 'w'))
 outFile2 = './phase_1.tsv'
 
 # This object will house the first three attributes noted in the comments above. 
@@ -94,6 +98,7 @@ entry2List = []
 goData = {}
 
 print 'stage1'
+profiler.start('stage1')
 # Begin building the list of Entry objects
 for line in prot_ref_map_file:
 	mappings = line.split('\t')
@@ -105,6 +110,7 @@ for line in prot_ref_map_file:
 	entry1List.append(Entry1(prot_acc=mappings[0],ref_acc=uniref_acc, go_terms=mappings[6]))
 
 print 'stage2'
+profiler.start('stage2')
 # Want to start with this since it'd be a waste of time to find the evidence
 # for those GO entries that don't have a corresponding UniRef entity.
 for line in go_prot_map_file:
@@ -115,6 +121,7 @@ for line in go_prot_map_file:
 	goData.setdefault(mappings[0], []).append(mappings[1])
 
 print 'stage3'
+profiler.start('stage3')
 # Just gathering the relevant data, not building the final file yet. 
 for line in go_tsv_file:
 	elements = line.split('\t')
@@ -126,6 +133,7 @@ for line in go_tsv_file:
 		entry2List.append(Entry2(go_noted_acc=elements[1],evidence_type=elements[0],reference_id=ref_id,go_term=elements[4].strip(' ')))
 
 print 'stage4'
+profiler.start('stage4')
 # Now all the data has been gathered, build the final map file.
 for x in entry2List:
 	outFile1.write('\t'.join([x.go_noted_acc, x.evidence_type, x.reference_id, x.go_term]))
@@ -135,8 +143,10 @@ outFile1.close() # switch to reading it
 # This next step isn't ideal, but only need to run this step once.
 
 print 'stage5'
+profiler.start('stage5')
+goData = profiler.countLookups(goData)
 # First, add in the UniProt accs related to the noted GO ID
-with open('./map_file.v1.tsv', 'r') as input_file, open(outFile2, 'w') as output_file:
+with profiler.countRead(open('./map_file.v1.tsv', 'r')) as input_file, profiler.countWrite(open(outFile2, 'w')) as output_file:
 	relevant = False
 	go_to_uniprot = ''
 	for line in input_file:
@@ -158,3 +168,5 @@ with open('./map_file.v1.tsv', 'r') as input_file, open(outFile2, 'w') as output
 			output_file.write(line + '\t' + go_to_uniprot.replace('\n','') + '\n')
 		else:
 			output_file.write(line + '\t' + '\n') # keep the tabs consistent
+
+profiler.finish()
@@ -11,25 +11,31 @@
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 #uniprot_uniref_map =  str(sys.argv[1])
 sprot_dat =  str(sys.argv[1]) 
 
 #prot_ref_map_file = gzip.open(uniprot_uniref_map, 'rb')
-sprot_file = open(sprot_dat) 
+sprot_file = profiler.countRead(open(sprot_dat)) 
 outFile = './phase_2.tsv'
 
 uniqueSprotWithEv = set()
 uniqueSprotIds = set()
 
 print 'stage1'
+profiler.start('stage1')
 for line in sprot_file:
 	sprot_with_ev = line.replace('\n','') #rstrip not working?
 	uniqueSprotWithEv.add(sprot_with_ev)
 
 print 'stage2'
+profiler.start('stage2')
 # Append the SwissProt data that wasn't detected by GO
-with open('./phase_1.tsv', 'r') as input_file, open(outFile, 'w') as output_file:
+with profiler.countRead(open('./phase_1.tsv', 'r')) as input_file, profiler.countWrite(open(outFile, 'w')) as output_file:
 	for line in input_file:
 		line = line.replace('\n','')
 		elements = line.split('\t')
@@ -46,10 +52,13 @@ with open('./phase_1.tsv', 'r') as input_file, open(outFile, 'w') as output_file
 		output_file.write(line + '\n')	
 
 print 'stage3'
+profiler.start('stage3')
 # Up til now, building on the assumption that a GO noted accession is present. However,
 # need to be able to map those entries which only were found to have evidence through
 # SwissProt. This will then exclude columns 2-4. 
-with open(outFile, 'a') as output_file:
+with profiler.countWrite(open(outFile, 'a')) as output_file:
 	for x in uniqueSprotWithEv:
 		if x not in uniqueSprotIds:
 			output_file.write('UniProtKB:'+x+'\t'+'\t'+'\t'+'\t'+x+'\n')
+
+profiler.finish()
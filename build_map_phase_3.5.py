@@ -5,27 +5,33 @@
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 uniprot_uniref_map =  str(sys.argv[1]) # important to get the same dated versions of all UniProt files 
 
-prot_ref_map_file = gzip.open(uniprot_uniref_map, 'rb') 
+prot_ref_map_file = profiler.countRead(gzip.open(uniprot_uniref_map, 'rb'), compressed=True) 
 outFile = './phase_3.5.tsv'
 
 regexForMappedAccession = r"UniRef100\_(\w+)"
-protData = {}
+protData = profiler.countLookups({})
 
 print 'stage1'
+profiler.start('stage1')
 # Begin building the list of Entry objects
 for line in prot_ref_map_file:
 	mappings = line.split('\t')
 	protData[mappings[0]] = mappings[6]
 
 print 'stage2'
+profiler.start('stage2')
 # Now that UniProt accs are present, map to UniRef accs. It is important to 
 # remember the size of the objects for this loop. Only want to iterate over
 # the largest object (entry1List) if we absolutely have to and always be sure
 # to break at the point of finding the relevant info. 
-with open('./phase_3.tsv', 'r') as input_file, open(outFile, 'w') as output_file:
+with profiler.countRead(open('./phase_3.tsv', 'r')) as input_file, profiler.countWrite(open(outFile, 'w')) as output_file:
 	for line in input_file:
 		relevant = False
 		prot_to_go = ''
@@ -65,3 +71,5 @@ with open('./phase_3.tsv', 'r') as input_file, open(outFile, 'w') as output_file
 					prot_to_go += go_data
 		if relevant:
 			output_file.write(line + '\t' + prot_to_go + '\n')
+
+profiler.finish()
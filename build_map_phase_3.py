@@ -9,16 +9,21 @@
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 uniprot_uniref_map =  str(sys.argv[1]) # important to get the same dated versions of all UniProt files 
 
-prot_ref_map_file = gzip.open(uniprot_uniref_map, 'rb') 
+prot_ref_map_file = profiler.countRead(gzip.open(uniprot_uniref_map, 'rb'), compressed=True) 
 outFile = './phase_3.tsv'
 
 regexForMappedAccession = r"UniRef100\_(\w+)"
-protData = {}
+protData = profiler.countLookups({})
 
 print 'stage1'
+profiler.start('stage1')
 # Begin building the list of Entry objects
 for line in prot_ref_map_file:
 	mappings = line.split('\t')
@@ -33,11 +38,12 @@ for line in prot_ref_map_file:
 		protData[mappings[0]] = uniref_acc
 
 print 'stage2'
+profiler.start('stage2')
 # Now that UniProt accs are present, map to UniRef accs. It is important to 
 # remember the size of the objects for this loop. Only want to iterate over
 # the largest object (entry1List) if we absolutely have to and always be sure
 # to break at the point of finding the relevant info. 
-with open('./phase_2.tsv', 'r') as input_file, open(outFile, 'w') as output_file:
+with profiler.countRead(open('./phase_2.tsv', 'r')) as input_file, profiler.countWrite(open(outFile, 'w')) as output_file:
 	for line in input_file:
 		relevant = False
 		ref_to_prot = ''
@@ -82,3 +88,5 @@ with open('./phase_2.tsv', 'r') as input_file, open(outFile, 'w') as output_file
 					ref_to_prot += uniref
 		if relevant:
 			output_file.write(line + '\t' + ref_to_prot + '\n')
+
+profiler.finish()
@@ -5,10 +5,14 @@
 # Author: James Matsumura
 
 import sys, os, re, gzip
+from profiling import Profiler
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
 
 sprot_dat =  str(sys.argv[1]) 
 
-sprot_file = gzip.open(sprot_dat, 'rb') 
+sprot_file = profiler.countRead(gzip.open(sprot_dat, 'rb'), compressed=True) 
 outFile = './final_file.tsv'
 
 footerFound = False
@@ -22,9 +26,10 @@ regexForSprotReferences = r"ECO:0000269\|PubMed:(\d+)"
 
 uniquePMIds = set()
 uniqueUnirefIds = set()
-sprotData = {}
+sprotData = profiler.countLookups({})
 
 print 'stage1'
+profiler.start('stage1')
 # Just gather the data from the sprot file, add these values to their objects later. Note
 # that only a hash/dict is needed here as there are only two data points to store. 
 for line in sprot_file:
@@ -59,8 +64,9 @@ for line in sprot_file:
 # hitting >n^2 complexity. 
 
 print 'stage2'
+profiler.start('stage2')
 # Finally, append the SwissProt data and all the references associated with each UniProt acc
-with open('./phase_3.5.tsv', 'r') as input_file, open(outFile, 'w') as output_file:
+with profiler.countRead(open('./phase_3.5.tsv', 'r')) as input_file, profiler.countWrite(open(outFile, 'w')) as output_file:
 	for line in input_file:
 		line = line.replace('\n','')
 		elements = line.split('\t')
@@ -99,3 +105,5 @@ with open('./phase_3.5.tsv', 'r') as input_file, open(outFile, 'w') as output_fi
 				if elements[5] in sprotData:
 					uniref_refs += 'PMID:'+sprotData[elements[5]]
 		output_file.write(line+'\t'+uniprot_refs+'\t'+uniref_refs+'\n')
+
+profiler.finish()
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+
+# The purpose of this script is to do the one full pass over the UniRef100
+# fasta file that the custom subset builders would otherwise each need to do
+# every time the evidence criteria changes. It recompresses the fasta into
+# BGZF (still gzip readable) and records where each UniRef100 entry lives so
+# that build_custom_uniref100.py and build_goset_uniref100.py can seek straight
+# to the relevant clusters. Only needs to be rerun with a new UniRef release.
+#
+# Outputs:
+# 1) uniref100.fasta.bgz - BGZF copy of the input fasta
+# 2) uniref100.fasta.bgz.idx - tab-delimited acc, block offset, offset within block, length
+# sorted by acc so the subset builders can binary search it
+#
+# HOWTO:
+# ./build_uniref100_index.py path_to_uniref_file
+#
+# Author: James Matsumura
+
+import sys, os, re, gzip, subprocess
+from profiling import Profiler
+from uniref_index import BgzfWriter
+
+profiler = Profiler(sys.argv) # must come before reading any arguments
+re = profiler.countRegex(re)
+
+unirefFile =  str(sys.argv[1])
+
+origUnirefFile = profiler.countRead(gzip.open(unirefFile, 'rb'), compressed=True)
+bgzfFile = './uniref100.fasta.bgz'
+outFile = profiler.countWrite(BgzfWriter(bgzfFile))
+unsortedIndex = bgzfFile + '.idx.unsorted'
+indexFile = open(unsortedIndex, 'w')
+
+regexForUnirefAccession = r"^>UniRef100\_(\w+)\s+.*"
+
+foundEntry = None
+entryStart = None
+entryLength = 0
+
+print "stage 1"
+profiler.start('stage1')
+# 1)
+# Same header check as the subset builders so the index only holds those
+# entries a full pass would have been able to pull out. Each entry runs from
+# its header up to the next header.
+for line in origUnirefFile:
+
+	if(line.startswith('>')):
+		if(foundEntry != None):
+			indexFile.write('\t'.join([foundEntry, str(entryStart[0]), str(entryStart[1]), str(entryLength)])+'\n')
+		foundEntry = None
+		findEntry = re.search(regexForUnirefAccession, line)
+		if(findEntry):
+			foundEntry = findEntry.group(1)
+			entryStart = outFile.tell()
+			entryLength = 0
+
+	entryLength += len(line)
+	outFile.write(line)
+
+if(foundEntry != None):
+	indexFile.write('\t'.join([foundEntry, str(entryStart[0]), str(entryStart[1]), str(entryLength)])+'\n')
+
+outFile.close()
+indexFile.close()
+
+print "stage 2"
+profiler.start('stage2')
+# 2)
+# Far too many entries to sort in memory here, let sort do it on disk. Its
+# temporary files go alongside the outputs rather than a possibly small /tmp.
+# The C locale keeps the byte ordering the same as the string comparisons used
+# when searching the index.
+sortEnv = dict(os.environ, LC_ALL='C')
+subprocess.check_call(['sort', '-t', '\t', '-k1,1', '-T', os.path.dirname(bgzfFile), '-o', bgzfFile + '.idx', unsortedIndex], env=sortEnv)
+os.remove(unsortedIndex)
+
+profiler.finish()
@@ -0,0 +1,247 @@
+#!/usr/bin/python
+#
+# Optional profiling for the build_* scripts so a slow run can be narrowed down
+# to being gzip, regex, dict or write bound without having to modify the
+# scripts each time. Nothing here does anything unless the script was called
+# with one of:
+#
+# --profile           stage timings, hot path counters and sampled stacks
+# --profile=cprofile  stage timings, hot path counters and a cProfile dump per stage
+#
+# Outputs (prefix is the script name, e.g. profile_build_map_phase_1):
+# 1) prefix.json - machine readable summary of every stage with wall/CPU time and
+# counter totals (regex calls, dict lookups and scans, bytes decompressed/read/written)
+# 2) prefix.stageN.folded - sampled stacks in the collapsed format that
+# flamegraph.pl/speedscope read, one file per stage, only with --profile
+# 3) prefix.stageN.prof - pstats output per stage, only with --profile=cprofile
+#
+# When disabled, every wrapper hands back the object it was given so the hot
+# loops run exactly as they would without profiling. When enabled, per-stage
+# figures are approximate: timings include the overhead of the wrappers and the
+# sampler, and counters only cover calls made through the wrapped objects. Compare
+# them between runs made with the same mode rather than against an unprofiled run.
+#
+# Only the main process is sampled. CPU time of worker processes (e.g. the
+# indexed subset in uniref_index.py) is included in cpu_seconds once they have
+# been joined, and they report their own bytes decompressed, but their stacks
+# are not in the .folded files.
+#
+# Author: James Matsumura
+
+import sys, os, time, json, signal, platform, cProfile
+
+sampleInterval = 0.005 # seconds of CPU time between stack samples
+
+# User and system CPU time of this process and of any children that have been
+# waited on, e.g. multiprocessing workers after pool.join().
+def cpuTimes():
+	times = os.times()
+	return times[0] + times[1], times[2] + times[3]
+
+# Stand-in for the re module that counts each search/match call. Anything else
+# is passed straight through to the real module.
+class CountingRe:
+	def __init__(self, module, counters):
+		self.module = module
+		self.counters = counters
+
+	def search(self, *args, **kwargs):
+		self.counters['regex_calls'] += 1
+		return self.module.search(*args, **kwargs)
+
+	def match(self, *args, **kwargs):
+		self.counters['regex_calls'] += 1
+		return self.module.match(*args, **kwargs)
+
+	def __getattr__(self, name):
+		return getattr(self.module, name)
+
+# File wrapper counting the bytes passing through it. Iterating over lines
+# of a gzip file is the decompression, so the count is the uncompressed size.
+class CountingFile:
+	def __init__(self, handle, counters, readCounter):
+		self.handle = handle
+		self.counters = counters
+		self.readCounter = readCounter
+
+	def __iter__(self):
+		for line in self.handle:
+			self.counters[self.readCounter] += len(line)
+			yield line
+
+	def write(self, data):
+		self.counters['bytes_written'] += len(data)
+		return self.handle.write(data)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.handle.close()
+
+	def __getattr__(self, name):
+		return getattr(self.handle, name)
+
+class CountingDict(dict):
+	def __init__(self, counters, *args):
+		dict.__init__(self, *args)
+		self.counters = counters
+
+	def __contains__(self, key):
+		self.counters['dict_lookups'] += 1
+		return dict.__contains__(self, key)
+
+	def __getitem__(self, key):
+		self.counters['dict_lookups'] += 1
+		return dict.__getitem__(self, key)
+
+	def get(self, key, default=None):
+		self.counters['dict_lookups'] += 1
+		return dict.get(self, key, default)
+
+	# Linear scans over a dict are what a lookup turns into when the keys need
+	# rewriting first, track these separately as they're far more expensive. The
+	# number of items each scan visits before it breaks out is the real cost, so
+	# count those too along with the size of the dict being scanned.
+	def iteritems(self):
+		self.counters['dict_scans'] += 1
+		self.counters['dict_scan_size'] += len(self)
+		for item in dict.iteritems(self):
+			self.counters['dict_scan_items'] += 1
+			yield item
+
+class CountingSet(set):
+	def __init__(self, counters, *args):
+		set.__init__(self, *args)
+		self.counters = counters
+
+	def __contains__(self, key):
+		self.counters['dict_lookups'] += 1
+		return set.__contains__(self, key)
+
+class Profiler:
+	counterNames = ('regex_calls', 'dict_lookups', 'dict_scans', 'dict_scan_items',
+		'dict_scan_size', 'bytes_decompressed', 'bytes_read', 'bytes_written')
+
+	# Pulls the --profile flag out of argv so the scripts can keep reading
+	# their positional arguments as they always have.
+	def __init__(self, argv):
+		self.mode = None
+		for arg in list(argv[1:]):
+			if arg == '--profile':
+				self.mode = 'sample'
+				argv.remove(arg)
+			elif arg.startswith('--profile='):
+				self.mode = arg.split('=', 1)[1]
+				argv.remove(arg)
+		if self.mode not in (None, 'sample', 'cprofile'):
+			sys.exit("unknown profile mode '%s', use --profile or --profile=cprofile" % self.mode)
+		self.enabled = self.mode != None
+		self.prefix = './profile_' + os.path.basename(argv[0]).replace('.py', '')
+		self.counters = dict((x, 0) for x in self.counterNames)
+		self.stages = []
+		self.current = None
+		self.started = time.time()
+
+	def countRegex(self, module):
+		if not self.enabled:
+			return module
+		return CountingRe(module, self.counters)
+
+	def countRead(self, handle, compressed=False):
+		if not self.enabled:
+			return handle
+		if compressed:
+			return CountingFile(handle, self.counters, 'bytes_decompressed')
+		return CountingFile(handle, self.counters, 'bytes_read')
+
+	def countWrite(self, handle):
+		if not self.enabled:
+			return handle
+		return CountingFile(handle, self.counters, 'bytes_written')
+
+	# Copies the given set/dict when enabled, only use this for ones that are
+	# done being built or are still empty.
+	def countLookups(self, container):
+		if not self.enabled:
+			return container
+		if isinstance(container, dict):
+			return CountingDict(self.counters, container)
+		return CountingSet(self.counters, container)
+
+	# Each call closes out whatever stage was running before it.
+	def start(self, name):
+		if not self.enabled:
+			return
+		self._endStage()
+		self.current = {'name': name, 'wall': time.time(), 'cpu': cpuTimes(),
+			'counters': dict(self.counters), 'stacks': {}}
+		if self.mode == 'cprofile':
+			self.current['profile'] = cProfile.Profile()
+			self.current['profile'].enable()
+		else:
+			signal.signal(signal.SIGPROF, self._sample)
+			signal.setitimer(signal.ITIMER_PROF, sampleInterval, sampleInterval)
+
+	# Closes out the current stage without starting another, for anything between
+	# stages that shouldn't count towards either of them.
+	def stop(self):
+		if not self.enabled:
+			return
+		self._endStage()
+
+	def finish(self):
+		if not self.enabled:
+			return
+		self._endStage()
+		summary = {
+			'script': os.path.basename(sys.argv[0]),
+			'args': sys.argv[1:],
+			'mode': self.mode,
+			'python': platform.python_version(),
+			'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+			'wall_seconds': time.time() - self.started,
+			'sample_interval': sampleInterval,
+			'notes': ['per-stage figures are approximate, timings include profiling overhead and counters only cover wrapped objects',
+				'cpu_seconds includes worker processes, only the main process is sampled'],
+			'counters': self.counters,
+			'stages': self.stages,
+		}
+		with open(self.prefix + '.json', 'w') as summaryFile:
+			json.dump(summary, summaryFile, indent=2, sort_keys=True)
+		print 'profile written to ' + self.prefix + '.json'
+
+	def _sample(self, signum, frame):
+		stack = []
+		while frame is not None:
+			code = frame.f_code
+			stack.append('%s:%s:%d' % (os.path.basename(code.co_filename), code.co_name, frame.f_lineno))
+			frame = frame.f_back
+		stack = ';'.join(reversed(stack))
+		stacks = self.current['stacks']
+		stacks[stack] = stacks.get(stack, 0) + 1
+
+	def _endStage(self):
+		if self.current is None:
+			return
+		stage = self.current
+		self.current = None
+		if self.mode == 'cprofile':
+			stage['profile'].disable()
+			stage['profile'].dump_stats('%s.%s.prof' % (self.prefix, stage['name']))
+		else:
+			signal.setitimer(signal.ITIMER_PROF, 0, 0)
+			with open('%s.%s.folded' % (self.prefix, stage['name']), 'w') as foldedFile:
+				for stack, count in sorted(stage['stacks'].items()):
+					foldedFile.write('%s %d\n' % (stack, count))
+		ownCpu, workerCpu = cpuTimes()
+		stageSummary = {
+			'name': stage['name'],
+			'wall_seconds': time.time() - stage['wall'],
+			'cpu_seconds': ownCpu + workerCpu - sum(stage['cpu']),
+			'worker_cpu_seconds': workerCpu - stage['cpu'][1],
+			'counters': dict((x, self.counters[x] - stage['counters'][x]) for x in self.counterNames),
+		}
+		if self.mode == 'sample':
+			stageSummary['samples'] = sum(stage['stacks'].values())
+		self.stages.append(stageSummary)
@@ -0,0 +1,179 @@
+#!/usr/bin/python
+#
+# Helpers for building and reading an offset index over a BGZF copy of the
+# UniRef100 fasta file. BGZF is just a series of small gzip members (each
+# holding at most 64KB of uncompressed data) so the file is still readable
+# by gzip/zcat while also allowing a seek straight to any one member. Each
+# indexed record is stored as:
+#
+# UniRef100 acc <tab> compressed block offset <tab> offset within block <tab> length
+#
+# where the length is the uncompressed size of the header plus its sequence
+# lines. Records may span more than one block, the reader handles this.
+#
+# The index is sorted by accession so each wanted ID is found with a search
+# over the file rather than parsing all of the hundreds of millions of lines
+# for every subset. The wanted IDs are sorted too, so each search gallops
+# forward from the previous hit and costs seeks in proportion to the log of the
+# gap between them. Sparse subsets take up to ~30 seeks per ID while dense
+# ones end up close to a single sequential read of the index.
+#
+# Used by build_uniref100_index.py to create the index and by the
+# build_*_uniref100.py scripts to pull a subset without a full pass.
+#
+# Author: James Matsumura
+
+import os, struct, zlib, multiprocessing
+
+# Max uncompressed data per block, same limit samtools/htslib use so that
+# the compressed block always fits under the 64KB BSIZE field.
+maxBlockSize = 65280
+
+bgzfHeader = '\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+bgzfEOF = '\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00' + \
+	'\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+
+class BgzfWriter:
+	def __init__(self, path):
+		self.handle = open(path, 'wb')
+		self.buffer = ''
+		self.blockOffset = 0 # compressed offset of the block being filled
+
+	def tell(self):
+		# Position the next write will land at as (block offset, offset within block)
+		if len(self.buffer) >= maxBlockSize:
+			self._flushBlock()
+		return (self.blockOffset, len(self.buffer))
+
+	def write(self, data):
+		self.buffer += data
+		while len(self.buffer) >= maxBlockSize:
+			self._flushBlock()
+
+	def _flushBlock(self):
+		data = self.buffer[:maxBlockSize]
+		self.buffer = self.buffer[maxBlockSize:]
+		compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+		compressed = compressor.compress(data) + compressor.flush()
+		blockSize = len(bgzfHeader) + 2 + len(compressed) + 8
+		self.handle.write(bgzfHeader)
+		self.handle.write(struct.pack('<H', blockSize - 1))
+		self.handle.write(compressed)
+		self.handle.write(struct.pack('<iI', zlib.crc32(data), len(data)))
+		self.blockOffset += blockSize
+
+	def close(self):
+		while self.buffer != '':
+			self._flushBlock()
+		self.handle.write(bgzfEOF)
+		self.handle.close()
+
+# Every block must be a gzip member with the extra 'BC' subfield holding its
+# size, which a plain gzip file (e.g. the original uniref100.fasta.gz) lacks.
+def checkHeader(header, bgzfPath):
+	if len(header) < 18 or header[:4] != '\x1f\x8b\x08\x04' or header[12:14] != 'BC':
+		raise ValueError("%s is not a BGZF file, pass the uniref100.fasta.bgz made by build_uniref100_index.py along with its index" % bgzfPath)
+
+# Returns the uncompressed data of the block starting at the given offset along
+# with the offset of the block that follows it.
+def readBlock(handle, blockOffset):
+	handle.seek(blockOffset)
+	header = handle.read(18)
+	checkHeader(header, handle.name)
+	blockSize = struct.unpack('<H', header[16:18])[0] + 1
+	compressed = handle.read(blockSize - 18)
+	return zlib.decompress(compressed[:-8], -15), blockOffset + blockSize
+
+# Returns the first line starting at or after the given position of the index.
+def lineAt(handle, position):
+	if position == 0:
+		handle.seek(0)
+	else:
+		handle.seek(position - 1)
+		handle.readline()
+	return handle.readline()
+
+# Only want the entries for the subset, no point parsing the whole index. The
+# wanted IDs are searched in sorted order so each search starts from where the
+# last one landed, doubling its step until it passes the ID and then bisecting
+# back within that last step.
+def loadIndex(indexPath, wantedIds):
+	entries = []
+	with open(indexPath, 'rb') as indexFile:
+		size = os.fstat(indexFile.fileno()).st_size
+		start = 0
+		for acc in sorted(wantedIds):
+			lo = start
+			step = 4096 # about a page of index lines
+			hi = lo + step
+			while hi < size:
+				line = lineAt(indexFile, hi)
+				if line == '' or line.split('\t', 1)[0] >= acc:
+					break
+				lo = hi + 1
+				step *= 2
+				hi = lo + step
+			hi = min(hi, size)
+			while lo < hi:
+				mid = (lo + hi) // 2
+				line = lineAt(indexFile, mid)
+				if line == '' or line.split('\t', 1)[0] >= acc:
+					hi = mid
+				else:
+					lo = mid + 1
+			start = lo
+			elements = lineAt(indexFile, lo).rstrip('\n').split('\t')
+			if elements[0] == acc:
+				entries.append((int(elements[1]), int(elements[2]), int(elements[3])))
+	entries.sort() # back into file order so the output matches a full pass
+	return entries
+
+# Worker for each chunk of the index. Entries are sorted so neighbouring records
+# tend to share a block, keep the last block decompressed around to reuse. Also
+# hands back how much was decompressed as the workers can't be profiled directly.
+def fetchRecords(args):
+	bgzfPath, entries = args
+	records = []
+	decompressed = 0
+	lastBlock = {} # block offset -> (data, next block offset), only the most recent
+	with open(bgzfPath, 'rb') as handle:
+		for blockOffset, withinBlock, length in entries:
+			if blockOffset in lastBlock:
+				block, nextOffset = lastBlock[blockOffset]
+			else:
+				block, nextOffset = readBlock(handle, blockOffset)
+				decompressed += len(block)
+			data = block
+			lastOffset = blockOffset
+			# A record can run past the end of its starting block
+			while len(data) < withinBlock + length:
+				lastOffset = nextOffset
+				block, nextOffset = readBlock(handle, nextOffset)
+				decompressed += len(block)
+				data += block
+			lastBlock = {lastOffset: (block, nextOffset)}
+			records.append(data[withinBlock:withinBlock + length])
+	return ''.join(records), decompressed
+
+# Pull every wanted UniRef100 record from the BGZF file and write them out in the
+# same order a full pass over the fasta would have produced. Bytes decompressed by
+# the workers are added to counters (see profiling.py) when given.
+def writeSubset(bgzfPath, indexPath, wantedIds, outFile, processes=None, counters=None):
+	with open(bgzfPath, 'rb') as handle: # fail here rather than in every worker
+		checkHeader(handle.read(18), bgzfPath)
+	entries = loadIndex(indexPath, wantedIds)
+	if processes is None:
+		processes = multiprocessing.cpu_count()
+	chunkCount = processes * 4
+	chunkSize = max(1, (len(entries) + chunkCount - 1) // chunkCount)
+	chunks = [(bgzfPath, entries[i:i+chunkSize]) for i in range(0, len(entries), chunkSize)]
+	pool = multiprocessing.Pool(processes)
+	try:
+		for records, decompressed in pool.imap(fetchRecords, chunks):
+			outFile.write(records)
+			if counters is not None:
+				counters['bytes_decompressed'] += decompressed
+	finally:
+		pool.close()
+		pool.join()
+	return len(entries)